@@ -2,6 +2,7 @@ from sanic import Sanic
 from sanic.response import json
 from sanic.log import logger
 from sanic.response import text
+from dbus.exceptions import DBusException
 
 import nm
 from accesspoint import AccessPoint
@@ -46,19 +47,55 @@ async def access_point_down(request):
     logger.info('deactivating accesspoint')
     return json({"status":state})
 
-@app.route("/modem/state")
-async def get_modem_state(request):
+def get_modem_manager():
     mm = app.config.mm
     # if the modem object is empty, try get another one.
     if mm is None:
         mm = ModemManager()
         app.config.mm = mm
+    return mm
+
+@app.route("/modem/state")
+async def get_modem_state(request):
+    mm = get_modem_manager()
     modem = mm.get_first()
     signal = mm.get_modem_signal_quality(modem)
     accessTech = mm.get_modem_access_tech(modem)
     connectionState = mm.get_modem_state(modem)    
     return json({"modem": {"signal": signal,"connectionState": connectionState, "access": accessTech} })
 
+@app.route("/modem/connect")
+async def modem_connect(request):
+    apn = request.args.get('apn', '')
+    ip_type = request.args.get('iptype')
+    mm = get_modem_manager()
+    modem = mm.get_first()
+    if modem is None:
+        return json({"error": "No modem found"})
+    try:
+        logger.info('connecting modem, apn: %s' % apn)
+        connected = await request.app.loop.run_in_executor(
+            None, mm.connect_modem, modem, apn, ip_type)
+        return json({"connected": connected})
+    except (DBusException, ValueError) as e:
+        logger.info('error connecting modem')
+        return json({"error": str(e)})
+
+@app.route("/modem/disconnect")
+async def modem_disconnect(request):
+    mm = get_modem_manager()
+    modem = mm.get_first()
+    if modem is None:
+        return json({"error": "No modem found"})
+    try:
+        logger.info('disconnecting modem')
+        disconnected = await request.app.loop.run_in_executor(
+            None, mm.disconnect_modem, modem)
+        return json({"disconnected": disconnected})
+    except DBusException as e:
+        logger.info('error disconnecting modem')
+        return json({"error": str(e)})
+
 @app.route("/modem")
 async def get_modem(request):
     mm = ModemManager()
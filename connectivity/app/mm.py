@@ -6,6 +6,7 @@ from datetime import datetime
 import json
 import os
 import enum
+import time
 
 from dbus.mainloop.glib import DBusGMainLoop
 from gi.repository import GLib
@@ -58,6 +59,25 @@ class MMModemAccessTechnology(enum.Enum):
     MM_MODEM_ACCESS_TECHNOLOGY_LTE         = 1 << 14
     MM_MODEM_ACCESS_TECHNOLOGY_ANY         = 0xFFFFFFFF
 
+# https://developer.gnome.org/ModemManager/unstable/ModemManager-Flags-and-Enumerations.html#MMBearerIpFamily
+class MMBearerIpFamily(enum.Enum):
+    MM_BEARER_IP_FAMILY_NONE   = 0
+    MM_BEARER_IP_FAMILY_IPV4   = 1 << 0
+    MM_BEARER_IP_FAMILY_IPV6   = 1 << 1
+    MM_BEARER_IP_FAMILY_IPV4V6 = 1 << 2
+    MM_BEARER_IP_FAMILY_ANY    = 0xFFFFFFFF
+
+# ip type names accepted by the API, mapped to MMBearerIpFamily values
+BEARER_IP_TYPES = {
+    'ipv4': MMBearerIpFamily.MM_BEARER_IP_FAMILY_IPV4,
+    'ipv6': MMBearerIpFamily.MM_BEARER_IP_FAMILY_IPV6,
+    'ipv4v6': MMBearerIpFamily.MM_BEARER_IP_FAMILY_IPV4V6,
+    'any': MMBearerIpFamily.MM_BEARER_IP_FAMILY_ANY,
+}
+
+# bringing up a data call can take well over the default D-Bus timeout (25s)
+CONNECT_TIMEOUT = 120
+
 # singleton: main app loop
 class MainLoop(object):
 
@@ -325,6 +345,28 @@ class MMModemMessaging(DBusInterface):
     def signal_added(self, handler = message_added):
         self.setup_signal('Added', handler)
 
+class MMModemSimple(DBusInterface):
+
+    def __init__(self, modem):
+        if not isinstance(modem, MMModem):
+            modem = MMModem(modem)
+        self.set_proxy_object(modem)
+        super(MMModemSimple, self).__init__(dbus_interface='org.freedesktop.ModemManager1.Modem.Simple')
+
+    # return object path of the connected bearer
+    def connect(self, apn, ip_type = None):
+        props = {'apn': dbus.String(apn)}
+        if ip_type is not None:
+            props['ip-type'] = dbus.UInt32(ip_type)
+        bearer = self.interface.Connect(dbus.Dictionary(props, signature='sv'),
+                                        timeout=CONNECT_TIMEOUT)
+        return str(bearer)
+
+    # disconnect bearer; "/" disconnects all bearers of the modem.
+    # The bearer objects are kept, so that they can be reused on reconnect.
+    def disconnect(self, bearer = '/'):
+        self.interface.Disconnect(dbus.ObjectPath(bearer), timeout=CONNECT_TIMEOUT)
+
 class ModemManager(ModemManagerObject):
 
     modems = None
@@ -387,3 +429,32 @@ class ModemManager(ModemManagerObject):
     def get_modem_state(self, modem):
         state = modem.get_property('State')
         return MMModemState(state).name
+
+    # connect the modem data call through Modem.Simple, which waits for the
+    # modem to be enabled and registered, and reuses an existing bearer with
+    # matching properties instead of creating a new one.
+    # parameters:
+    #   ip_type     one of BEARER_IP_TYPES keys or None
+    def connect_modem(self, modem, apn, ip_type = None):
+        family = None
+        if ip_type is not None:
+            if ip_type not in BEARER_IP_TYPES:
+                raise ValueError("Unknown ip type: %s" % ip_type)
+            family = BEARER_IP_TYPES[ip_type].value
+
+        # modem properties are cached, re-read them to get current bearers
+        modem.set_properties()
+        bearers = modem.get_property('Bearers') or []
+
+        start = time.monotonic()
+        path = MMModemSimple(modem).connect(apn, family)
+
+        return {"bearer": path,
+                "reused": path in bearers,
+                "connectTime": round(time.monotonic() - start, 3)}
+
+    # disconnect all data calls of the modem, keeping bearers for reuse
+    def disconnect_modem(self, modem):
+        MMModemSimple(modem).disconnect()
+        # modem properties are cached, re-read them to get the new state
+        return {"connectionState": self.get_modem_state(MMModem(modem.get_object_path()))}
@@ -1,13 +1,136 @@
+import threading
+from collections import OrderedDict
+
+import dbus
 import NetworkManager
+from dbus.mainloop.glib import DBusGMainLoop
+
+from mm import MainLoop
+
 c = NetworkManager.const
 
+NM_SERVICE = 'org.freedesktop.NetworkManager'
+NM_PATH = '/org/freedesktop/NetworkManager'
+NM_IFACE = 'org.freedesktop.NetworkManager'
+NM_ACTIVE_IFACE = 'org.freedesktop.NetworkManager.Connection.Active'
+NM_DEVICE_IFACE = 'org.freedesktop.NetworkManager.Device'
+DBUS_PROPS_IFACE = 'org.freedesktop.DBus.Properties'
+
+class ActiveConnections(object):
+    'Active connection table, kept up to date from NetworkManager signals'
+
+    def __init__(self):
+        # private connection, so the glib mainloop is attached no matter
+        # who created the shared system bus first
+        self.bus = dbus.SystemBus(private=True, mainloop=DBusGMainLoop())
+        self.lock = threading.Lock()
+        # active connection path -> fields returned by the API, in NM order
+        self.connections = OrderedDict()
+        # device path -> interface name
+        self.interfaces = {}
+        # unique bus name of the running NetworkManager, '' if not running
+        self.owner = None
+
+        self.bus.add_signal_receiver(self.properties_changed, 'PropertiesChanged',
+                                     DBUS_PROPS_IFACE, NM_SERVICE, path_keyword='path')
+        self.bus.add_signal_receiver(self.state_changed, 'StateChanged',
+                                     NM_ACTIVE_IFACE, NM_SERVICE, path_keyword='path')
+
+        # object paths are reused when NetworkManager restarts, so start
+        # over whenever it goes away or comes back
+        try:
+            owner = self.bus.get_name_owner(NM_SERVICE)
+        except dbus.exceptions.DBusException:
+            owner = ''
+        self.name_owner_changed(owner)
+        self.bus.watch_name_owner(NM_SERVICE, self.name_owner_changed)
+
+        thread = threading.Thread(target=MainLoop().run, daemon=True)
+        thread.start()
+
+    def get_interface(self, path):
+        path = str(path)
+        if path not in self.interfaces:
+            dev = self.bus.get_object(NM_SERVICE, path)
+            self.interfaces[path] = str(dev.Get(NM_DEVICE_IFACE, 'Interface', dbus_interface=DBUS_PROPS_IFACE))
+        return self.interfaces[path]
+
+    def fetch(self, path):
+        # one GetAll per new active connection; Id and Type are exposed on
+        # the active connection itself, no need for the settings blob
+        conn = self.bus.get_object(NM_SERVICE, path)
+        props = conn.GetAll(NM_ACTIVE_IFACE, dbus_interface=DBUS_PROPS_IFACE)
+        return {"name": str(props['Id']),
+                "type": str(props['Type']),
+                "default": bool(props['Default']),
+                "devices": [self.get_interface(x) for x in props['Devices']]}
+
+    def name_owner_changed(self, owner):
+        owner = str(owner)
+        if owner == self.owner:
+            return
+        self.owner = owner
+        with self.lock:
+            self.connections = OrderedDict()
+            self.interfaces = {}
+        if owner:
+            nm = self.bus.get_object(NM_SERVICE, NM_PATH)
+            self.sync(nm.Get(NM_IFACE, 'ActiveConnections', dbus_interface=DBUS_PROPS_IFACE))
+
+    def sync(self, paths):
+        paths = [str(x) for x in paths]
+        added = {}
+        for path in paths:
+            if path not in self.connections:
+                try:
+                    added[path] = self.fetch(path)
+                except dbus.exceptions.DBusException:
+                    # deactivated before we could read it
+                    pass
+        with self.lock:
+            connections = OrderedDict()
+            for path in paths:
+                if path in self.connections:
+                    connections[path] = self.connections[path]
+                elif path in added:
+                    connections[path] = added[path]
+            self.connections = connections
+
+    def properties_changed(self, interface, changed, invalidated, path=None):
+        if interface == NM_IFACE and path == NM_PATH:
+            if 'ActiveConnections' in changed:
+                self.sync(changed['ActiveConnections'])
+        elif interface == NM_ACTIVE_IFACE and path in self.connections:
+            update = {}
+            if 'Id' in changed:
+                update['name'] = str(changed['Id'])
+            if 'Type' in changed:
+                update['type'] = str(changed['Type'])
+            if 'Default' in changed:
+                update['default'] = bool(changed['Default'])
+            if 'Devices' in changed:
+                update['devices'] = [self.get_interface(x) for x in changed['Devices']]
+            if update:
+                with self.lock:
+                    if path in self.connections:
+                        self.connections[path] = dict(self.connections[path], **update)
+
+    def state_changed(self, state, reason, path=None):
+        if state == NetworkManager.NM_ACTIVE_CONNECTION_STATE_DEACTIVATED:
+            with self.lock:
+                self.connections.pop(str(path), None)
+
+    def get(self):
+        with self.lock:
+            return [dict(x) for x in self.connections.values() if x['type'] != "bridge"]
+
+active_connections = None
+
 def get_active_connections():
-    connections = []
-    for conn in NetworkManager.NetworkManager.ActiveConnections:
-        settings = conn.Connection.GetSettings()['connection']
-        if (settings['type'] != "bridge"):
-            connections.append({"name": settings['id'], "type": settings['type'], "default": conn.Default, "devices": [x.Interface for x in conn.Devices] })
-    return connections
+    global active_connections
+    if active_connections is None:
+        active_connections = ActiveConnections()
+    return active_connections.get()
 
 def get_global_state():
     return {"state": c('state', NetworkManager.NetworkManager.State) }